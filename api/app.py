@@ -5,8 +5,10 @@ import json
 import uuid
 from datetime import datetime
 from risk_calculator import AlzheimersRiskCalculator
-from crew_agents import DataValidationAgent, RiskCalculationAgent, GeminiExplanationAgent
+from crew_agents import DataValidationAgent, RiskCalculationAgent, get_explanation_agent, llm_status
 from database import Database
+from page_cache import PageCache, SAVED_DATA_SLOT, page_response
+from jinja2.utils import htmlsafe_json_dumps
 import openai
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
@@ -37,9 +39,13 @@ except Exception as e:
     print(f"Database connection failed: {e}")
     db = None
 
+# Cache rendered pages per process; disabled in debug so template edits show up immediately
+page_cache = PageCache(is_enabled=lambda: not app.debug and os.environ.get('PAGE_CACHE', 'on') != 'off')
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    page = page_cache.get('index', lambda: render_template('index.html'))
+    return page_response(page, request, app.response_class)
 
 @app.route('/assessment')
 def assessment():
@@ -63,7 +69,13 @@ def assessment():
     elif not assessment_data:
         assessment_data = {}
     
-    return render_template('assessment.html', data=assessment_data)
+    # Only the saved data varies, so render the page once and splice the JSON in
+    shell = page_cache.get(
+        'assessment',
+        lambda: render_template('assessment.html', saved_data_json=SAVED_DATA_SLOT)
+    )
+    page = shell.with_slot(SAVED_DATA_SLOT, htmlsafe_json_dumps(assessment_data, dumps=app.json.dumps))
+    return page_response(page, request, app.response_class, private=True)
 
 @app.route('/save_step', methods=['POST'])
 def save_step():
@@ -118,8 +130,8 @@ def calculate_risk():
         risk_agent = RiskCalculationAgent()
         risk_result = risk_agent.analyze(session['assessment_data'])
         
-        # Generate AI explanation
-        explanation_agent = GeminiExplanationAgent()
+        # Generate explanation; ?explain=llm asks for the LLM even when the local tier is primary
+        explanation_agent = get_explanation_agent(use_llm=request.args.get('explain') == 'llm')
         ai_explanation = explanation_agent.explain_risk(session['assessment_data'], risk_result)
         
         # Store results in session
@@ -214,7 +226,47 @@ def admin_assessments():
     
     try:
         assessments = db.get_all_assessments(limit=50)
-        return render_template('admin_assessments.html', assessments=assessments)
+        jobs = db.get_recent_jobs(limit=20)
+        return render_template('admin_assessments.html', assessments=assessments, jobs=jobs)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/llm_status')
+def admin_llm_status():
+    """Circuit breaker and concurrency limiter state for the OpenAI dependency in this worker"""
+    return jsonify(llm_status())
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a batch of assessments for offline scoring by scoring_worker.py"""
+    if not db:
+        return jsonify({'error': 'Database not available'}), 500
+    
+    try:
+        job_data = request.get_json()
+        records = job_data.get('records') if isinstance(job_data, dict) else None
+        
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': 'Request body must contain a non-empty "records" list'}), 400
+        if not all(isinstance(record, dict) for record in records):
+            return jsonify({'error': 'Every entry in "records" must be an object'}), 400
+        
+        job_id = db.enqueue_job(records, label=job_data.get('label'))
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    """Return the status, progress and (when finished) results of a scoring job"""
+    if not db:
+        return jsonify({'error': 'Database not available'}), 500
+    
+    try:
+        job = db.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2,11 +2,181 @@
 from risk_calculator import AlzheimersRiskCalculator
 import openai
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Outbound LLM call limits
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 10))
+LLM_SLOW_CALL = float(os.environ.get('LLM_SLOW_CALL', 6))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+LLM_QUEUE_WAIT = float(os.environ.get('LLM_QUEUE_WAIT', 1))
+
+# The circuit breaker decides when to try again, so client-side retries would only
+# stretch a single call past its deadline
+openai.max_retries = 0
+
+
+class CircuitBreaker:
+    """Stops calling a dependency after repeated failures or slow calls.
+
+    closed: calls go through. open: calls are rejected until reset_timeout has
+    passed. half_open: a single trial call decides whether to close or reopen.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, slow_call_threshold):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_opened_at = None
+        self.trial_in_flight = False
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        with self.lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.half_opened_at = time.monotonic()
+                self.trial_in_flight = False
+
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+
+            self.total_rejected += 1
+            return False
+
+    def is_stale(self, started_at):
+        """Whether a result should be ignored because the breaker has tripped since its call began.
+
+        While open, no result changes the state. While half_open, only the trial
+        call (started after the transition) decides whether to close or reopen.
+        """
+        if self.state == 'open':
+            return True
+        return self.state == 'half_open' and started_at < self.half_opened_at
+
+    def record_success(self, duration, started_at):
+        # A call that succeeded but blew the latency budget still counts against the upstream
+        if duration >= self.slow_call_threshold:
+            self.record_failure(started_at)
+            return
+
+        with self.lock:
+            if self.is_stale(started_at):
+                return
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self, started_at):
+        with self.lock:
+            self.total_failures += 1
+            if self.is_stale(started_at):
+                return
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'total_failures': self.total_failures,
+                'total_rejected': self.total_rejected,
+                'seconds_until_retry': (
+                    max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+                    if self.state == 'open' else None
+                )
+            }
+
+
+class AdaptiveConcurrencyLimiter:
+    """Caps in-flight calls, growing the cap while calls are fast and halving it when they are not.
+
+    The cap is halved at most once per latency_target window, so one burst of
+    concurrent timeouts counts as a single congestion signal rather than one per call.
+    """
+
+    def __init__(self, max_limit, min_limit=None, latency_target=LLM_SLOW_CALL, max_wait=LLM_QUEUE_WAIT):
+        self.max_limit = max_limit
+        self.min_limit = min_limit if min_limit is not None else min(max_limit, max(2, max_limit // 4))
+        self.latency_target = latency_target
+        self.max_wait = max_wait
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.total_shed = 0
+        self.last_decrease = None
+        self.condition = threading.Condition()
+
+    def try_acquire(self):
+        """Take a slot, waiting up to max_wait for one; callers that get False should fall back"""
+        with self.condition:
+            has_slot = self.condition.wait_for(lambda: self.in_flight < int(self.limit), timeout=self.max_wait)
+            if not has_slot:
+                self.total_shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def cancel(self):
+        """Give back a slot that was never used for a call"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def release(self, ok, duration):
+        with self.condition:
+            self.in_flight -= 1
+            if ok and duration < self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                now = time.monotonic()
+                if self.last_decrease is None or now - self.last_decrease >= self.latency_target:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self.last_decrease = now
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                'limit': int(self.limit),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self.in_flight,
+                'total_shed': self.total_shed
+            }
+
+
+# Shared by every explanation agent in this process
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET, LLM_SLOW_CALL)
+llm_limiter = AdaptiveConcurrencyLimiter(LLM_MAX_CONCURRENCY)
+
+
+def llm_status():
+    """Current breaker and limiter state for monitoring"""
+    return {
+        'timeout_seconds': LLM_TIMEOUT,
+        'slow_call_seconds': LLM_SLOW_CALL,
+        'breaker': llm_breaker.snapshot(),
+        'concurrency': llm_limiter.snapshot()
+    }
+
 class DataValidationAgent:
     def validate(self, data):
         required_fields = [
@@ -56,11 +226,148 @@ class RiskCalculationAgent:
         calculator = AlzheimersRiskCalculator(data)
         return calculator.calculate_total_risk()
 
+class LocalExplanationAgent:
+    """Builds explanations from the factor breakdown and inputs with a fixed rule and template library"""
+
+    FACTOR_LABELS = {
+        'age': 'your age',
+        'medical_history': 'your medical and family history',
+        'lifestyle': 'lifestyle habits',
+        'education': 'your level of formal education',
+        'gender': 'gender',
+        'ethnicity': 'ethnic background'
+    }
+
+    MODIFIABLE_FACTORS = {'lifestyle', 'medical_history', 'education'}
+
+    SUMMARIES = {
+        'Low': "Your overall risk score is {score}/100, which places you in the Low risk category. {drivers}",
+        'Moderate': "Your overall risk score is {score}/100, which places you in the Moderate risk category. {drivers}",
+        'High': "Your overall risk score is {score}/100, which places you in the High risk category. {drivers} "
+                "This is not a diagnosis, but it is a good reason to discuss your cognitive health with your doctor."
+    }
+
+    # (condition on patient data, recommendation) in priority order
+    RULES = [
+        (lambda d: d.get('smoking') == 'yes',
+         "Stopping smoking is one of the most effective changes you can make; ask your doctor about support programs."),
+        (lambda d: d.get('hypertension') == 'yes',
+         "Keep your blood pressure under control with regular checks and any prescribed medication."),
+        (lambda d: d.get('diabetes') == 'yes',
+         "Manage your blood sugar closely, since well-controlled diabetes protects both your heart and brain."),
+        (lambda d: d.get('cardiovascular') == 'yes',
+         "Follow your heart-health plan carefully; what is good for your heart is good for your brain."),
+        (lambda d: int(d.get('physical_activity', 0)) < 3,
+         "Build up to at least 150 minutes of moderate exercise per week, such as brisk walking, swimming or cycling."),
+        (lambda d: d.get('depression') == 'yes',
+         "Keep up treatment and support for depression, and stay socially connected with friends and family."),
+        (lambda d: int(d.get('diet', 5)) < 6,
+         "Move towards a Mediterranean-style diet rich in vegetables, whole grains, fish and olive oil."),
+        (lambda d: int(d.get('sleep', 7)) < 7,
+         "Work on improving your sleep quality with a regular bedtime, a dark and quiet bedroom, "
+         "and less screen time before bed; mention ongoing poor sleep to your doctor."),
+        (lambda d: int(d.get('alcohol', 0)) > 7,
+         "Cut back on alcohol to no more than 7 units per week."),
+        (lambda d: not 18.5 <= float(d.get('bmi', 25)) <= 25,
+         "Work towards a healthy weight (BMI between 18.5 and 25) through balanced meals and regular activity."),
+        (lambda d: d.get('head_injury') == 'yes',
+         "Protect your head from further injury by wearing helmets and reducing fall risks at home."),
+        (lambda d: d.get('family_history') == 'yes',
+         "Let your doctor know about your family history so they can monitor your memory over time."),
+        (lambda d: d.get('education') in ('none', 'high_school'),
+         "Keep challenging your brain by learning a new skill, language or instrument.")
+    ]
+
+    GENERAL_RECOMMENDATIONS = [
+        "Keep up regular physical activity, aiming for 150 minutes per week.",
+        "Continue eating a balanced, Mediterranean-style diet.",
+        "Keep your mind active with reading, puzzles or learning new skills.",
+        "Keep a regular sleep routine to protect your sleep quality."
+    ]
+
+    TIPS = ("Stay socially engaged, manage stress, and have regular check-ups that include "
+            "your blood pressure, cholesterol and blood sugar.")
+
+    ENCOURAGEMENT = {
+        'Low': "You are already doing a lot right. Keeping these habits will help protect your cognitive health for years to come.",
+        'Moderate': "Many of the factors behind your score can be changed, and small, steady steps can make a real difference.",
+        'High': "Even with a higher score, many risk factors are modifiable, and the changes above can meaningfully lower your risk."
+    }
+
+    MAX_RECOMMENDATIONS = 4
+
+    # Share of the total score a factor needs before it is named as a main contributor
+    MIN_DRIVER_SHARE = 0.2
+
+    def explain_risk(self, patient_data, risk_result):
+        risk_level = risk_result['risk_level']
+        summary = self.SUMMARIES.get(risk_level, self.SUMMARIES['Moderate']).format(
+            score=risk_result['total_score'],
+            drivers=self.describe_drivers(risk_result['factor_breakdown'])
+        )
+
+        recommendations = self.select_recommendations(patient_data)
+        steps = ' '.join(f"{i}) {text}" for i, text in enumerate(recommendations, start=1))
+
+        return (f"{summary}\n\nTo reduce your risk: {steps}\n\n{self.TIPS}\n\n"
+                f"{self.ENCOURAGEMENT.get(risk_level, self.ENCOURAGEMENT['Moderate'])}")
+
+    def describe_drivers(self, factor_breakdown):
+        """Name the factors contributing the most points to the total score"""
+        total = sum(factor_breakdown.values())
+        if total <= 0:
+            return "No single factor stands out as a major contributor."
+
+        ranked = sorted(factor_breakdown.items(), key=lambda item: item[1], reverse=True)
+        top = [factor for factor, points in ranked[:2] if points / total >= self.MIN_DRIVER_SHARE]
+        if not top:
+            return "No single factor stands out as a major contributor."
+
+        labels = [self.FACTOR_LABELS.get(factor, factor.replace('_', ' ')) for factor in top]
+        if len(labels) > 1:
+            drivers = f"The main contributors are {' and '.join(labels)}."
+            fixed = "These cannot be changed"
+        else:
+            drivers = f"The main contributor is {labels[0]}."
+            fixed = "This cannot be changed"
+        if not any(factor in self.MODIFIABLE_FACTORS for factor in top):
+            drivers += f" {fixed}, so the lifestyle steps below are where you can make a difference."
+        return drivers
+
+    def select_recommendations(self, patient_data):
+        recommendations = []
+        for condition, text in self.RULES:
+            try:
+                applies = condition(patient_data)
+            except (TypeError, ValueError):
+                applies = False
+            if applies:
+                recommendations.append(text)
+            if len(recommendations) == self.MAX_RECOMMENDATIONS:
+                return recommendations
+
+        # Top up with general advice so there are always at least three steps
+        for text in self.GENERAL_RECOMMENDATIONS:
+            if len(recommendations) >= 3:
+                break
+            recommendations.append(text)
+        return recommendations
+
+
 class GeminiExplanationAgent:
     def __init__(self):
         self.openai_client = openai
 
     def explain_risk(self, patient_data, risk_result):
+        # Skip the call entirely while the upstream is failing or we are at our concurrency limit
+        if not llm_limiter.try_acquire():
+            return self.fallback_explanation(patient_data, risk_result)
+        if not llm_breaker.allow_request():
+            llm_limiter.cancel()
+            return self.fallback_explanation(patient_data, risk_result)
+
+        start = time.monotonic()
+        ok = False
         try:
             prompt = f"""
             You are a medical expert specializing in Alzheimer's risk assessment. 
@@ -86,10 +393,31 @@ class GeminiExplanationAgent:
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.7
+                temperature=0.7,
+                timeout=LLM_TIMEOUT
             )
             
-            return response.choices[0].message.content.strip()
+            explanation = response.choices[0].message.content.strip()
+            ok = True
+            return explanation
             
         except Exception as e:
-            return f"Based on your assessment, your risk level is {risk_result['risk_level']}. The main contributing factors include age and medical history. To reduce your risk, consider: 1) Regular physical exercise (150 minutes per week), 2) A Mediterranean-style diet rich in omega-3 fatty acids, 3) Quality sleep (7-9 hours nightly), 4) Mental stimulation through reading, puzzles, or learning new skills. Remember, many risk factors are modifiable, and taking proactive steps can significantly impact your cognitive health."
+            return self.fallback_explanation(patient_data, risk_result)
+        
+        finally:
+            duration = time.monotonic() - start
+            llm_limiter.release(ok, duration)
+            if ok:
+                llm_breaker.record_success(duration, start)
+            else:
+                llm_breaker.record_failure(start)
+
+    def fallback_explanation(self, patient_data, risk_result):
+        return LocalExplanationAgent().explain_risk(patient_data, risk_result)
+
+
+def get_explanation_agent(use_llm=False):
+    """Pick the explanation tier: EXPLANATION_TIER=local keeps the LLM for explicit requests only"""
+    if use_llm or os.environ.get('EXPLANATION_TIER', 'llm') != 'local':
+        return GeminiExplanationAgent()
+    return LocalExplanationAgent()
@@ -1,9 +1,10 @@
 
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from contextlib import contextmanager
 import json
+import uuid
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -53,6 +54,51 @@ class Database:
                 ON assessments(session_id)
             ''')
             
+            # BRIN index stays tiny as the table grows and serves the archival scan on created_at
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessments_created_at 
+                ON assessments USING BRIN (created_at)
+            ''')
+            
+            # Partial index covering only abandoned sessions for the retention job
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_assessments_incomplete 
+                ON assessments(updated_at) WHERE risk_result IS NULL
+            ''')
+            
+            # Create scoring jobs table used as a work queue by scoring_worker.py
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scoring_jobs (
+                    id SERIAL PRIMARY KEY,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    label VARCHAR(255),
+                    payload JSONB NOT NULL,
+                    result JSONB,
+                    error TEXT,
+                    total_items INTEGER NOT NULL DEFAULT 0,
+                    processed_items INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    heartbeat_at TIMESTAMP,
+                    claim_token VARCHAR(36),
+                    finished_at TIMESTAMP
+                )
+            ''')
+            
+            # Tables created before job leases were added lack these columns
+            cursor.execute('''
+                ALTER TABLE scoring_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP
+            ''')
+            cursor.execute('''
+                ALTER TABLE scoring_jobs ADD COLUMN IF NOT EXISTS claim_token VARCHAR(36)
+            ''')
+            
+            # Partial index so workers only scan jobs that are still waiting
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_scoring_jobs_queued 
+                ON scoring_jobs(id) WHERE status = 'queued'
+            ''')
+            
             conn.commit()
     
     def save_assessment(self, session_id, assessment_data, risk_result=None, ai_explanation=None):
@@ -124,3 +170,213 @@ class Database:
             ''', (limit,))
             
             return cursor.fetchall()
+
+    def enqueue_job(self, records, label=None):
+        """Add a batch scoring job to the queue and return its ID"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO scoring_jobs (label, payload, total_items)
+                VALUES (%s, %s, %s)
+                RETURNING id
+            ''', (label, json.dumps(records), len(records)))
+            
+            job_id = cursor.fetchone()[0]
+            conn.commit()
+            return job_id
+    
+    def claim_next_job(self, lease_seconds=300):
+        """Atomically mark the oldest claimable job as running and return it.
+        
+        Running jobs whose worker has not sent a heartbeat within lease_seconds
+        are treated as abandoned and claimed again. Each claim gets a new
+        claim_token, and later updates only apply while the token still matches,
+        so a worker that lost its lease cannot touch the job's new run.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # SKIP LOCKED lets several workers poll the queue without blocking each other
+            cursor.execute('''
+                UPDATE scoring_jobs 
+                SET status = 'running', processed_items = 0, claim_token = %s,
+                    started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM scoring_jobs 
+                    WHERE status = 'queued' 
+                       OR (status = 'running' 
+                           AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                    ORDER BY id 
+                    FOR UPDATE SKIP LOCKED 
+                    LIMIT 1
+                )
+                RETURNING id, label, payload, total_items, claim_token
+            ''', (str(uuid.uuid4()), lease_seconds))
+            
+            job = cursor.fetchone()
+            conn.commit()
+            return job
+    
+    def update_job_progress(self, job_id, claim_token, processed_items):
+        """Record progress of a running job and renew its lease; False if the claim was lost"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE scoring_jobs 
+                SET processed_items = %s, heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND claim_token = %s AND status = 'running'
+            ''', (processed_items, job_id, claim_token))
+            
+            updated = cursor.rowcount == 1
+            conn.commit()
+            return updated
+    
+    def release_job(self, job_id, claim_token):
+        """Put a job that was interrupted mid-run back on the queue"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE scoring_jobs 
+                SET status = 'queued', processed_items = 0, started_at = NULL, 
+                    heartbeat_at = NULL, claim_token = NULL
+                WHERE id = %s AND claim_token = %s AND status = 'running'
+            ''', (job_id, claim_token))
+            
+            conn.commit()
+    
+    def finish_job(self, job_id, claim_token, result=None, error=None):
+        """Mark a job as done, or failed if an error message is given; False if the claim was lost"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE scoring_jobs 
+                SET status = %s, result = %s, error = %s, 
+                    processed_items = CASE WHEN %s IS NULL THEN total_items ELSE processed_items END,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND claim_token = %s AND status = 'running'
+            ''', ('failed' if error else 'done',
+                  json.dumps(result) if result is not None else None,
+                  error, error, job_id, claim_token))
+            
+            updated = cursor.rowcount == 1
+            conn.commit()
+            return updated
+    
+    def get_job(self, job_id):
+        """Retrieve a scoring job by ID"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute('''
+                SELECT id, status, label, result, error, total_items, processed_items,
+                       created_at, started_at, finished_at
+                FROM scoring_jobs 
+                WHERE id = %s
+            ''', (job_id,))
+            
+            return cursor.fetchone()
+    
+    def get_recent_jobs(self, limit=20):
+        """Retrieve recent scoring jobs with elapsed time for the admin page"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute('''
+                SELECT id, status, label, error, total_items, processed_items,
+                       created_at, started_at, finished_at,
+                       EXTRACT(EPOCH FROM (COALESCE(finished_at, CURRENT_TIMESTAMP) - started_at)) 
+                           AS elapsed_seconds
+                FROM scoring_jobs 
+                ORDER BY id DESC 
+                LIMIT %s
+            ''', (limit,))
+            
+            return cursor.fetchall()
+
+    def expire_incomplete_assessments(self, older_than_days, batch_size=1000):
+        """Delete sessions that never reached a risk result, returning the number removed"""
+        total = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Delete in batches so each transaction holds locks only briefly
+            while True:
+                cursor.execute('''
+                    DELETE FROM assessments 
+                    WHERE id IN (
+                        SELECT id FROM assessments 
+                        WHERE risk_result IS NULL 
+                          AND updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+                        LIMIT %s
+                    )
+                ''', (older_than_days, batch_size))
+                
+                deleted = cursor.rowcount
+                conn.commit()
+                total += deleted
+                if deleted < batch_size:
+                    return total
+    
+    def archive_completed_assessments(self, older_than_days, write_rows, batch_size=500):
+        """Move completed assessments older than the cutoff out of the table.
+        
+        Each batch is passed to write_rows before it is deleted, in the same
+        transaction, so rows are only removed once they have been written.
+        """
+        total = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            while True:
+                cursor.execute('''
+                    SELECT id, session_id, assessment_data, risk_result, ai_explanation, 
+                           created_at, updated_at
+                    FROM assessments 
+                    WHERE risk_result IS NOT NULL 
+                      AND created_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+                    ORDER BY id 
+                    LIMIT %s 
+                    FOR UPDATE SKIP LOCKED
+                ''', (older_than_days, batch_size))
+                
+                rows = cursor.fetchall()
+                if not rows:
+                    return total
+                
+                write_rows(rows)
+                cursor.execute('''
+                    DELETE FROM assessments WHERE id = ANY(%s)
+                ''', ([row['id'] for row in rows],))
+                conn.commit()
+                total += len(rows)
+    
+    def restore_assessments(self, rows):
+        """Insert archived assessments back, skipping sessions that already exist"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            execute_values(cursor, '''
+                INSERT INTO assessments 
+                    (session_id, assessment_data, risk_result, ai_explanation, created_at, updated_at)
+                VALUES %s
+                ON CONFLICT (session_id) DO NOTHING
+            ''', [(row['session_id'], json.dumps(row['assessment_data']),
+                   json.dumps(row['risk_result']) if row['risk_result'] else None,
+                   row['ai_explanation'], row['created_at'], row['updated_at'])
+                  for row in rows], page_size=max(len(rows), 1))
+            
+            inserted = cursor.rowcount
+            conn.commit()
+            return inserted
+    
+    def vacuum_assessments(self):
+        """Reclaim space and refresh planner statistics after a retention run"""
+        with self.get_connection() as conn:
+            # VACUUM cannot run inside a transaction block
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute('VACUUM (ANALYZE) assessments')
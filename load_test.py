@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Load testing harness for the Alzheimer's Risk Assessment App
+Replays the full assessment flow at a configurable concurrency and reports
+per-route throughput, latency percentiles and error rates.
+
+Usage:
+    # 1. Start the bundled fake OpenAI endpoint
+    python load_test.py fake-openai --port 8081 --latency 0.8
+
+    # 2. Start the app pointed at it (leave DATABASE_URL unset to use session storage only)
+    OPENAI_BASE_URL=http://localhost:8081/v1 OPENAI_API_KEY=test gunicorn -w 4 -b 0.0.0.0:5000 api.app:app
+
+    # 3. Replay traffic
+    python load_test.py run --url http://localhost:5000 --concurrency 20 --sessions 200
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_EXPLANATION = (
+    "Your assessment shows a few areas worth attention. Staying physically active, "
+    "eating a Mediterranean-style diet, sleeping 7-9 hours and keeping your mind engaged "
+    "can all help protect your cognitive health. Many risk factors are modifiable, so "
+    "small, steady changes make a real difference."
+)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the OpenAI chat completions endpoint"""
+    latency = 0.5
+    jitter = 0.2
+    error_rate = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+
+        time.sleep(max(0, random.gauss(self.latency, self.jitter)))
+
+        if random.random() < self.error_rate:
+            self._send_json(500, {'error': {'message': 'Simulated upstream failure', 'type': 'server_error'}})
+            return
+
+        self._send_json(200, {
+            'id': 'chatcmpl-loadtest',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'gpt-3.5-turbo',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': FAKE_EXPLANATION},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 250, 'completion_tokens': 60, 'total_tokens': 310}
+        })
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_fake_openai(port, latency, jitter, error_rate):
+    """Serve the fake OpenAI endpoint until interrupted"""
+    FakeOpenAIHandler.latency = latency
+    FakeOpenAIHandler.jitter = jitter
+    FakeOpenAIHandler.error_rate = error_rate
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), FakeOpenAIHandler)
+    print(f"🤖 Fake OpenAI listening on http://localhost:{port}/v1 "
+          f"(latency {latency}s ± {jitter}s, error rate {error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+def random_patient():
+    """Generate a valid assessment split into the three form steps"""
+    yes_no = ['yes', 'no']
+    demographics = {
+        'age': random.randint(60, 90),
+        'gender': random.choice(['male', 'female']),
+        'ethnicity': random.choice(['caucasian', 'african_american', 'asian', 'other']),
+        'education': random.choice(['none', 'high_school', 'bachelors', 'higher'])
+    }
+    lifestyle = {
+        'bmi': round(random.uniform(15, 40), 1),
+        'smoking': random.choice(yes_no),
+        'alcohol': random.randint(0, 20),
+        'physical_activity': random.randint(0, 10),
+        'diet': random.randint(0, 10),
+        'sleep': random.randint(4, 10)
+    }
+    medical = {
+        'family_history': random.choice(yes_no),
+        'cardiovascular': random.choice(yes_no),
+        'diabetes': random.choice(yes_no),
+        'depression': random.choice(yes_no),
+        'head_injury': random.choice(yes_no),
+        'hypertension': random.choice(yes_no)
+    }
+    return demographics, lifestyle, medical
+
+
+class LoadStats:
+    """Thread-safe collector of per-route latencies and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, elapsed, ok):
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route] += 1
+
+    def report(self, wall_time):
+        print(f"\n{'Route':<18}{'Requests':>10}{'Errors':>9}{'Err %':>8}{'RPS':>9}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        print("-" * 84)
+        for route, samples in self.latencies.items():
+            samples = sorted(samples)
+            count = len(samples)
+            errors = self.errors[route]
+            print(f"{route:<18}{count:>10}{errors:>9}{errors / count:>8.1%}{count / wall_time:>9.1f}"
+                  f"{percentile(samples, 50) * 1000:>10.1f}"
+                  f"{percentile(samples, 95) * 1000:>10.1f}"
+                  f"{percentile(samples, 99) * 1000:>10.1f}")
+        total = sum(len(samples) for samples in self.latencies.values())
+        print("-" * 84)
+        print(f"Total: {total} requests in {wall_time:.1f}s ({total / wall_time:.1f} req/s)")
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+
+def timed_request(opener, stats, route, url, body=None, timeout=60):
+    """Issue one request and record its latency under the given route"""
+    data = None
+    headers = {}
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers['Content-Type'] = 'application/json'
+
+    request = urllib.request.Request(url, data=data, headers=headers)
+    start = time.perf_counter()
+    ok = False
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        ok = False
+    except Exception:
+        # Anything else (e.g. a truncated body) still counts against this route
+        stats.record(route, time.perf_counter() - start, False)
+        raise
+    stats.record(route, time.perf_counter() - start, ok)
+    return ok
+
+
+def run_session(base_url, stats):
+    """Replay one user's journey: form steps, risk calculation, results and PDF export"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    demographics, lifestyle, medical = random_patient()
+
+    timed_request(opener, stats, '/assessment', f"{base_url}/assessment")
+    for step in (demographics, lifestyle):
+        timed_request(opener, stats, '/save_step', f"{base_url}/save_step", body=step)
+    if not timed_request(opener, stats, '/calculate_risk', f"{base_url}/calculate_risk", body=medical):
+        return
+    timed_request(opener, stats, '/results', f"{base_url}/results")
+    timed_request(opener, stats, '/export_pdf', f"{base_url}/export_pdf")
+
+
+def run_load_test(base_url, concurrency, sessions):
+    stats = LoadStats()
+    print(f"🚀 Replaying {sessions} sessions against {base_url} with concurrency {concurrency}...")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_session, base_url.rstrip('/'), stats) for _ in range(sessions)]
+    wall_time = time.perf_counter() - start
+
+    # The failing request was already recorded as an error; report what went wrong
+    failures = [future.exception() for future in futures if future.exception()]
+    stats.report(wall_time)
+    if failures:
+        print(f"⚠️  {len(failures)} sessions aborted early; first error: {failures[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load testing harness for the risk assessment app")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fake = subparsers.add_parser('fake-openai', help="run a local fake OpenAI endpoint")
+    fake.add_argument('--port', type=int, default=8081)
+    fake.add_argument('--latency', type=float, default=0.5, help="mean response latency in seconds")
+    fake.add_argument('--jitter', type=float, default=0.2, help="latency standard deviation in seconds")
+    fake.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail with 500")
+
+    run = subparsers.add_parser('run', help="replay assessment traffic against a running app")
+    run.add_argument('--url', default='http://localhost:5000')
+    run.add_argument('--concurrency', type=int, default=10)
+    run.add_argument('--sessions', type=int, default=100, help="number of complete user journeys")
+
+    args = parser.parse_args()
+
+    if args.command == 'fake-openai':
+        run_fake_openai(args.port, args.latency, args.jitter, args.error_rate)
+    else:
+        run_load_test(args.url, args.concurrency, args.sessions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Rendered into assessment.html in place of the per-session JSON so the rest
+# of the page can be cached and the saved data spliced in per request
+SAVED_DATA_SLOT = '__SAVED_DATA_JSON__'
+
+
+class CachedPage:
+    """A rendered page with its validators and lazily built compressed variants"""
+
+    def __init__(self, body, last_modified=None, compress_level=9):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.last_modified = last_modified or datetime.now(timezone.utc).replace(microsecond=0)
+        self.compress_level = compress_level
+        self.encoded = {}
+        self.lock = threading.Lock()
+
+    def encode(self, encoding):
+        """Return the body compressed with the given encoding, compressing at most once"""
+        if encoding not in self.encoded:
+            with self.lock:
+                if encoding not in self.encoded:
+                    if encoding == 'br':
+                        # Brotli quality runs 0-11, gzip levels 1-9
+                        quality = 11 if self.compress_level >= 9 else 5
+                        self.encoded[encoding] = brotli.compress(self.body, quality=quality)
+                    else:
+                        # Fixed mtime keeps the bytes identical across workers, as the strong ETag promises
+                        self.encoded[encoding] = gzip.compress(self.body, compresslevel=self.compress_level, mtime=0)
+        return self.encoded[encoding]
+
+    def with_slot(self, slot, value):
+        """Return a new page with a placeholder replaced by per-request content"""
+        body = self.body.replace(slot.encode('utf-8'), value.encode('utf-8'))
+        return CachedPage(body, compress_level=6)
+
+
+class PageCache:
+    """Per-process cache of rendered template pages, filled on first request after a deploy"""
+
+    def __init__(self, is_enabled=None):
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.is_enabled = is_enabled or (lambda: True)
+
+    def get(self, key, render):
+        """Return the cached page for key, calling render() to build it on a miss"""
+        if not self.is_enabled():
+            return CachedPage(render())
+
+        page = self.pages.get(key)
+        if page is None:
+            with self.lock:
+                page = self.pages.get(key)
+                if page is None:
+                    page = CachedPage(render())
+                    self.pages[key] = page
+        return page
+
+    def clear(self):
+        with self.lock:
+            self.pages.clear()
+
+
+def choose_encoding(request):
+    """Pick the best content encoding the client accepts"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def page_response(page, request, response_class, private=False):
+    """Build a compressed response for a cached page, answering 304 when the client copy is current"""
+    encoding = choose_encoding(request)
+    etag = f"{page.etag}-{encoding}" if encoding else page.etag
+    # Per-request pages are validated by ETag only since their content can change at any time
+    last_modified = None if private else page.last_modified
+
+    # Check validators before compressing so a 304 costs no compression work
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = response_class(page.encode(encoding) if encoding else page.body, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    else:
+        response = response_class(status=304)
+
+    response.headers['Vary'] = 'Accept-Encoding, Cookie' if private else 'Accept-Encoding'
+    # Clients may keep the page but must revalidate it, which costs only a 304
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'public, no-cache'
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+
+    return response
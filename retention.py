@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Assessment retention job
+Expires abandoned sessions and moves old completed assessments into
+compressed newline-delimited JSON archives that can be streamed back in.
+
+Usage:
+    python retention.py run --incomplete-days 7 --archive-days 365 --archive-dir archives
+    python retention.py restore archives/assessments-20250101T020000-1a2b3c4d.ndjson.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime
+from dotenv import load_dotenv
+
+from database import Database
+
+# Load environment variables from .env file
+load_dotenv()
+
+RESTORE_BATCH_SIZE = 500
+
+
+def archive_path(archive_dir):
+    """Build a timestamped archive file name for this run"""
+    os.makedirs(archive_dir, exist_ok=True)
+    # The random suffix keeps overlapping runs from ever sharing a file
+    name = f"assessments-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    return os.path.join(archive_dir, name)
+
+
+def serialize_row(row):
+    """Turn a database row into one JSON line"""
+    record = {key: value for key, value in row.items() if key != 'id'}
+    record['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+    record['updated_at'] = row['updated_at'].isoformat() if row['updated_at'] else None
+    return json.dumps(record) + '\n'
+
+
+def run_retention(db, incomplete_days, archive_days, archive_dir, vacuum=False):
+    expired = db.expire_incomplete_assessments(incomplete_days)
+    print(f"🗑️  Expired {expired} incomplete assessments older than {incomplete_days} days")
+
+    path = archive_path(archive_dir)
+    # Exclusive mode: never truncate an archive whose rows may already be deleted
+    with gzip.open(path, 'xt', encoding='utf-8') as archive:
+        def write_rows(rows):
+            archive.writelines(serialize_row(row) for row in rows)
+            # Make sure the batch is on disk before the rows are deleted
+            archive.flush()
+            os.fsync(archive.buffer.fileobj.fileno())
+
+        archived = db.archive_completed_assessments(archive_days, write_rows)
+
+    if archived:
+        print(f"📦 Archived {archived} completed assessments older than {archive_days} days to {path}")
+    else:
+        os.remove(path)
+        print(f"📦 No completed assessments older than {archive_days} days to archive")
+
+    if vacuum and (expired or archived):
+        db.vacuum_assessments()
+        print("🧹 Vacuumed assessments table")
+
+
+def read_archive(path):
+    """Stream records from an archive file one at a time.
+
+    An archive from a run that died part way has no gzip trailer; reading
+    stops cleanly after its last complete line instead of failing.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        try:
+            for line in archive:
+                if not line.endswith('\n'):
+                    print(f"⚠️  Skipping incomplete final record in {path}")
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            print(f"⚠️  {path} is truncated; restoring the records written before the cut-off")
+
+
+def restore_archive(db, path):
+    restored = 0
+    batch = []
+    try:
+        for record in read_archive(path):
+            batch.append(record)
+            if len(batch) >= RESTORE_BATCH_SIZE:
+                # Hand the batch off before inserting so a failed insert is never retried below
+                pending, batch = batch, []
+                restored += db.restore_assessments(pending)
+    except Exception:
+        # Reading failed part way; rows in an archive no longer exist in the table,
+        # so still load the records that were read successfully
+        if batch:
+            restored += db.restore_assessments(batch)
+        print(f"❌ Restore of {path} stopped early after {restored} assessments")
+        raise
+
+    if batch:
+        restored += db.restore_assessments(batch)
+    print(f"♻️  Restored {restored} assessments from {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expire and archive old assessments")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="expire incomplete sessions and archive old completed ones")
+    run.add_argument('--incomplete-days', type=int, default=7,
+                     help="delete incomplete sessions not updated for this many days")
+    run.add_argument('--archive-days', type=int, default=365,
+                     help="archive completed assessments created more than this many days ago")
+    run.add_argument('--archive-dir', default='archives')
+    run.add_argument('--vacuum', action='store_true', help="run VACUUM ANALYZE afterwards")
+
+    restore = subparsers.add_parser('restore', help="load an archive file back into the database")
+    restore.add_argument('path')
+
+    args = parser.parse_args()
+    db = Database()
+
+    if args.command == 'run':
+        run_retention(db, args.incomplete_days, args.archive_days, args.archive_dir, args.vacuum)
+    else:
+        restore_archive(db, args.path)
+
+
+if __name__ == '__main__':
+    main()
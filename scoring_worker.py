@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Offline scoring worker
+Pulls batch scoring jobs from the scoring_jobs queue table and runs them
+across a pool of worker processes.
+
+Usage:
+    python scoring_worker.py --workers 4
+"""
+import argparse
+import multiprocessing
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from crew_agents import DataValidationAgent, RiskCalculationAgent, get_explanation_agent
+from database import Database
+
+# Load environment variables from .env file
+load_dotenv()
+
+POLL_INTERVAL = 2
+PROGRESS_EVERY = 25
+HEARTBEAT_INTERVAL = 30
+# Jobs whose worker has been silent this long are assumed dead and run again
+JOB_LEASE_SECONDS = 300
+SHUTDOWN_GRACE = 30
+
+
+class LeaseLost(Exception):
+    """The job was reclaimed by another worker after this worker's lease expired"""
+
+
+def run_job(db, job, explain=True, explain_concurrency=4):
+    """Validate, score and optionally explain each record, reporting progress as records complete"""
+    validator = DataValidationAgent()
+    risk_agent = RiskCalculationAgent()
+    explanation_agent = get_explanation_agent() if explain else None
+
+    def process_record(record):
+        # A malformed record gets its own error entry instead of failing the whole job
+        try:
+            is_valid, message = validator.validate(record)
+            if not is_valid:
+                return {'input': record, 'error': message}
+
+            item = {'input': record, 'risk_result': risk_agent.analyze(record)}
+            if explanation_agent:
+                item['ai_explanation'] = explanation_agent.explain_risk(record, item['risk_result'])
+            return item
+        except Exception as e:
+            return {'input': record, 'error': f"Invalid record: {e}"}
+
+    scored = []
+    last_heartbeat = time.monotonic()
+
+    # Explanation calls are network bound, so overlap them within each worker process
+    with ThreadPoolExecutor(max_workers=explain_concurrency if explain else 1) as executor:
+        for done, item in enumerate(executor.map(process_record, job['payload']), start=1):
+            scored.append(item)
+            # Progress updates double as the heartbeat that keeps the job's lease alive
+            if done % PROGRESS_EVERY == 0 or time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                if not db.update_job_progress(job['id'], job['claim_token'], done):
+                    raise LeaseLost()
+                last_heartbeat = time.monotonic()
+
+    return scored
+
+
+def worker_loop(explain=True, explain_concurrency=4):
+    """Claim and run jobs until interrupted, riding out database outages"""
+    # Turn terminate() into SystemExit so an in-flight job is handed back below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    db = Database()
+
+    while True:
+        try:
+            job = db.claim_next_job(lease_seconds=JOB_LEASE_SECONDS)
+        except Exception as e:
+            print(f"Could not poll the job queue: {e}")
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        if not job:
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        print(f"Running scoring job {job['id']} ({job['total_items']} records)")
+        try:
+            result = run_job(db, job, explain, explain_concurrency)
+            finish = {'result': result}
+        except LeaseLost:
+            print(f"Scoring job {job['id']} was reclaimed by another worker; dropping this run")
+            continue
+        except Exception as e:
+            print(f"Scoring job {job['id']} failed: {e}")
+            finish = {'error': str(e)}
+        except BaseException:
+            # Shutting down (Ctrl-C or terminate); let another worker pick the job up
+            print(f"Returning scoring job {job['id']} to the queue")
+            try:
+                db.release_job(job['id'], job['claim_token'])
+            except Exception as e:
+                print(f"Could not return scoring job {job['id']}; it will be reclaimed when its lease expires: {e}")
+            raise
+
+        try:
+            if not db.finish_job(job['id'], job['claim_token'], **finish):
+                print(f"Scoring job {job['id']} was reclaimed by another worker; discarding this run's result")
+        except Exception as e:
+            # The lease will expire and another worker will run the job again
+            print(f"Could not record the outcome of scoring job {job['id']}: {e}")
+            time.sleep(POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline scoring workers")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('--explain-concurrency', type=int, default=4,
+                        help="concurrent explanation calls per worker")
+    parser.add_argument('--no-explain', action='store_true',
+                        help="skip AI explanations and only compute risk scores")
+    args = parser.parse_args()
+
+    # Make sure the queue table exists before workers start polling
+    Database().create_tables()
+
+    print(f"🧠 Starting {args.workers} scoring workers...")
+    processes = []
+    for _ in range(args.workers):
+        process = multiprocessing.Process(
+            target=worker_loop,
+            args=(not args.no_explain, args.explain_concurrency),
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Workers received the same SIGINT; give them time to hand back their jobs
+        print("Stopping scoring workers...")
+        for process in processes:
+            process.join(timeout=SHUTDOWN_GRACE)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == '__main__':
+    main()